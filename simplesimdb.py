@@ -4,13 +4,126 @@ import hashlib  # for the hashing
 import json
 import operator
 import os.path  # to check for files
+import re
 import subprocess  # to run the create program
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
 
 with suppress(PackageNotFoundError):
     __version__ = version("simplesimdb")
 
+# The canonical form of an input dictionary that all hashes are computed from,
+# with and without escaping of non-ASCII characters.
+# Re-using a single encoder saves constructing a new one on every json.dumps
+# call.  Do not change sort_keys or the separators: they determine the name
+# of every file in existing databases.
+# Inputs are trees of JSON values, so the C encoder can skip its bookkeeping
+# for circular references (a circular input raises RecursionError instead)
+_HASH_ENCODERS = {
+    ensure_ascii: json.JSONEncoder(
+        sort_keys=True, ensure_ascii=ensure_ascii, check_circular=False
+    )
+    for ensure_ascii in (True, False)
+}
+# File names of unregistered inputs are their sha1 hashid
+_HASHID = re.compile(r"[0-9a-f]{40}")
+# Output file names of restarted simulations append hex(n) to the id
+_RESTART = re.compile(r"(.+)0x[0-9a-f]+")
+# Threads for overlapping file reads, which mostly wait for the file system
+_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _canonical_bytes(js, ensure_ascii=True):
+    """Serialize an input dictionary to the canonical form that is hashed"""
+    # for pure ASCII strings the utf-8 encoding is a plain copy
+    return _HASH_ENCODERS[ensure_ascii].encode(js).encode("utf-8")
+
+
+def _dump_bytes(js, indent=None, ensure_ascii=True):
+    """Serialize a dictionary for writing to disc
+
+    The canonical form if indent is None, else pretty printed with indent
+    """
+    if indent is None:
+        return _canonical_bytes(js, ensure_ascii)
+    return json.dumps(
+        js, sort_keys=True, ensure_ascii=ensure_ascii, indent=indent
+    ).encode("utf-8")
+
+
+def _hash_bytes(inputbytes):
+    """The hexadecimal sha1 hashid of a canonical input"""
+    # the hash names files, it does not protect anything
+    return hashlib.sha1(inputbytes, usedforsecurity=False).hexdigest()
+
+
+def _write_atomic(path, data):
+    """Write bytes to path such that no reader ever sees a partial file
+
+    The data is written to a temporary file path.<pid>.tmp first, which then
+    replaces path. The temporary file is removed if the write fails.
+    The pid only separates processes: callers must not write the same path
+    from several threads at once
+    """
+    tmpfile = f"{path}.{os.getpid()}.tmp"
+    try:
+        Path(tmpfile).write_bytes(data)
+        os.replace(tmpfile, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmpfile)
+        raise
+
+
+def _stat_key(stat):
+    """Identify the state of a file by its os.stat result
+
+    The inode and ctime change whenever the file is replaced, even within one
+    tick of the modification time
+    """
+    return (stat.st_ino, stat.st_ctime_ns, stat.st_mtime_ns, stat.st_size)
+
+
+def _is_id(name, registry, names):
+    """Check if name is the id of an input in the database
+
+    That is either a registered name (a key in names) or the sha1 of an input
+    that is not registered (not a key in registry)
+    """
+    return name in names or (name not in registry and bool(_HASHID.fullmatch(name)))
+
+
+def _load_json(path):
+    """Read and parse a json file"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_json_files(paths):
+    """Read and parse a list of json files, in parallel if there are many"""
+    if len(paths) <= 8:  # not worth starting threads
+        return [_load_json(path) for path in paths]
+    # reading the files is I/O bound: overlap the requests
+    with ThreadPoolExecutor(max_workers=_IO_WORKERS) as executor:
+        return list(executor.map(_load_json, paths))
+
+
+def _run(args, error, stdout):
+    """Run args and raise subprocess.CalledProcessError on a non-zero exit code
+
+    Only the output that is printed or attached to the exception (see the
+    error and stdout parameters of Manager.create) is captured, the rest is
+    discarded without passing through Python
+    """
+    return subprocess.run(
+        args,
+        check=True,
+        stdout=subprocess.PIPE if stdout == "display" else subprocess.DEVNULL,
+        stderr=subprocess.PIPE if error in ("display", "raise") else subprocess.DEVNULL,
+    )
+
 
 class Repeater:
     """Manage a single file pair (inputfile, outputfile)
@@ -23,12 +136,25 @@ class Repeater:
     """
 
     def __init__(
-        self, executable="./execute.sh", inputfile="temp.json", outputfile="temp.nc"
+        self,
+        executable="./execute.sh",
+        inputfile="temp.json",
+        outputfile="temp.nc",
+        indent=None,
+        ensure_ascii=True,
     ):
-        """Set the executable and files to use in the run method"""
+        """Set the executable and files to use in the run method
+
+        indent (int) : if not None, pretty print the inputfile with this
+            indentation instead of writing compact json
+        ensure_ascii (bool) : if False, write non-ASCII characters as UTF-8
+            instead of escaping them
+        """
         self.executable = executable
         self.inputfile = inputfile
         self.outputfile = outputfile
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
 
     @property
     def executable(self):
@@ -42,6 +168,14 @@ class Repeater:
     def outputfile(self):
         return self.__outputfile
 
+    @property
+    def indent(self):
+        return self.__indent
+
+    @property
+    def ensure_ascii(self):
+        return self.__ensure_ascii
+
     @executable.setter
     def executable(self, executable):
         self.__executable = executable
@@ -54,6 +188,14 @@ class Repeater:
     def outputfile(self, outputfile):
         self.__outputfile = outputfile
 
+    @indent.setter
+    def indent(self, indent):
+        self.__indent = indent
+
+    @ensure_ascii.setter
+    def ensure_ascii(self, ensure_ascii):
+        self.__ensure_ascii = ensure_ascii
+
     def run(self, js, error="display", stdout="ignore"):
         """Write inputfile and then run a simulation
 
@@ -74,13 +216,14 @@ class Repeater:
             print( process.stdout)
             return
         """
-        with open(self.inputfile, "w") as f:
-            json.dump(js, f, sort_keys=True, ensure_ascii=True, indent=4)
+        Path(self.__inputfile).write_bytes(
+            _dump_bytes(js, self.__indent, self.__ensure_ascii)
+        )
         try:
-            process = subprocess.run(
+            process = _run(
                 [self.__executable, self.__inputfile, self.__outputfile],
-                check=True,
-                capture_output=True,
+                error,
+                stdout,
             )
             if stdout == "display":
                 print(process.stdout)
@@ -92,9 +235,9 @@ class Repeater:
 
     def clean(self):
         """Remove inputfile and outputfile"""
-        if os.path.isfile(self.__inputfile):
+        with suppress(FileNotFoundError):
             os.remove(self.__inputfile)
-        if os.path.isfile(self.__outputfile):
+        with suppress(FileNotFoundError):
             os.remove(self.__outputfile)
 
 
@@ -132,7 +275,28 @@ class Manager:
     the correct name.
     """
 
-    def __init__(self, directory="./data", filetype="nc", executable="./execute.sh"):
+    __slots__ = (
+        "__directory",
+        "__ensure_ascii",
+        "__executable",
+        "__filetype",
+        "__indent",
+        "__log_output",
+        "_dir_prefix",
+        "_fs_cache",
+        "_out_suffix",
+        "_registry_cache",
+    )
+
+    def __init__(
+        self,
+        directory="./data",
+        filetype="nc",
+        executable="./execute.sh",
+        log_output=False,
+        indent=None,
+        ensure_ascii=True,
+    ):
         """init the Manager class
 
         Parameters
@@ -155,11 +319,24 @@ class Manager:
         subprocess.run([executable, directory/hashid.json,
         directory/hashid0xN.filetype, directory/hashid0x(N-1).filetype],...)
         that is it must take a third argument (the previous simulation)
+
+        log_output (bool) : If True, stdout and stderr of the executable are
+            written to the files outfile.log and outfile.err next to the
+            output file instead of being held in memory
+        indent (int) : if not None, pretty print the input files and the
+            registry with this indentation instead of writing compact json
+        ensure_ascii (bool) : if False, non-ASCII characters in the inputs are
+            written and hashed as UTF-8 instead of being escaped.
+            ATTENTION: this changes the id of every input that contains
+            non-ASCII characters, i.e. such existing entries are not found
+            any more. Decide once per database.
         """
         self.directory = directory
-        os.makedirs(self.__directory, exist_ok=True)
         self.filetype = filetype
         self.executable = executable
+        self.log_output = log_output
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
 
     @property
     def directory(self):
@@ -194,10 +371,50 @@ class Manager:
         """(string) : file extension of the output files"""
         return self.__filetype
 
+    @property
+    def log_output(self):
+        """(bool) : write stdout and stderr of the executable to files
+
+        If True, create redirects the output of the executable to the files
+        outfile.log and outfile.err. The logs are kept if the simulation
+        fails and are removed together with the output file. The stdout
+        argument of create has no effect in this case.
+        """
+        return self.__log_output
+
+    @property
+    def indent(self):
+        """(int) : indentation of the json files written by the Manager
+
+        If None (the default), input files are written in the compact,
+        canonical form that is hashed, such that the sha1 of an input file is
+        its id. Set e.g. to 4 to pretty print input files and the registry
+        for human readers. Does not change the ids.
+        """
+        return self.__indent
+
+    @property
+    def ensure_ascii(self):
+        """(bool) : escape non-ASCII characters in the json files
+
+        If True (the default), non-ASCII characters are escaped as in
+        json.dumps(ensure_ascii=True). If False, they are written as UTF-8,
+        which is faster and shorter. The setting is part of the canonical
+        form that inputs are hashed from: inputs that contain non-ASCII
+        characters get a different id for each value. Pure ASCII inputs are
+        not affected.
+        """
+        return self.__ensure_ascii
+
     @directory.setter
     def directory(self, directory):
         self.__directory = directory
-        os.makedirs(self.__directory, exist_ok=True)
+        # all paths are built by appending a file name to this prefix
+        self._dir_prefix = os.path.join(directory, "")
+        self._registry_cache = None
+        self._fs_cache = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
 
     @executable.setter
     def executable(self, executable):
@@ -206,6 +423,20 @@ class Manager:
     @filetype.setter
     def filetype(self, filetype):
         self.__filetype = filetype
+        # json output files need a suffix to be distinguishable from input files
+        self._out_suffix = "_out.json" if filetype == "json" else "." + filetype
+
+    @log_output.setter
+    def log_output(self, log_output):
+        self.__log_output = log_output
+
+    @indent.setter
+    def indent(self, indent):
+        self.__indent = indent
+
+    @ensure_ascii.setter
+    def ensure_ascii(self, ensure_ascii):
+        self.__ensure_ascii = ensure_ascii
 
     def create(self, js, n=0, name="", error="raise", stdout="ignore"):
         """Run a simulation if outfile does not exist yet
@@ -261,47 +492,51 @@ class Manager:
                 existing filename else
 
         """
-        hashid = self.hashinput(js)
+        # serialize only once: the canonical form is hashed and written to disc
+        inputbytes = _canonical_bytes(js, self.__ensure_ascii)
+        return self._create(
+            js, inputbytes, _hash_bytes(inputbytes), n, name, error, stdout
+        )
+
+    def _create(self, js, inputbytes, hashid, n, name, error, stdout):
+        """create with the canonical bytes and hashid of js already computed"""
         if name != "":
-            self.register(js, name)
-        ncfile = self.outfile(js, n)
+            self._register(hashid, name)
+        # read the registry only once
+        fileid = self._load_registry()[0].get(hashid, hashid)
+        ncfile = self._outfile_from_name(fileid, n)
         exists = os.path.isfile(ncfile)
         if exists:
             print("Existing simulation " + hashid[0:6] + "..." + ncfile[-9:])
             return ncfile
         else:
             print("Running simulation " + hashid[0:6] + "..." + ncfile[-9:])
+            self._fs_cache = None
             # First write the json file into the database
             # so that the program can read it as input
-            if not os.path.isfile(self.jsonfile(js)):
-                with open(self.jsonfile(js), "w") as f:
-                    json.dump(js, f, sort_keys=True, ensure_ascii=True, indent=4)
+            jsonfile = self._dir_prefix + fileid + ".json"
+            if not os.path.isfile(jsonfile):
+                if self.__indent is not None:
+                    inputbytes = _dump_bytes(js, self.__indent, self.__ensure_ascii)
+                _write_atomic(jsonfile, inputbytes)
+            args = [self.__executable, jsonfile, ncfile]
+            # Check if the simulation is a restart
+            if n > 0:
+                args.append(self._outfile_from_name(fileid, n - 1))
             # Run the code to create output file
             try:
-                # Check if the simulation is a restart
-                if n == 0:
-                    process = subprocess.run(
-                        [self.__executable, self.jsonfile(js), ncfile],
-                        check=True,
-                        capture_output=True,
-                    )
-                    if stdout == "display":
-                        print(process.stdout)
+                if self.__log_output:
+                    self._run_logged(args, ncfile)
                 else:
-                    previous_ncfile = self.outfile(js, n - 1)
-                    process = subprocess.run(
-                        [self.__executable, self.jsonfile(js), ncfile, previous_ncfile],
-                        check=True,
-                        capture_output=True,
-                    )
+                    process = _run(args, error, stdout)
                     if stdout == "display":
                         print(process.stdout)
             except subprocess.CalledProcessError as e:
                 # clean up entry and escalate exception
-                if os.path.isfile(ncfile):
+                with suppress(FileNotFoundError):
                     os.remove(ncfile)
                 if n == 0:  # only remove input if not restarted
-                    os.remove(self.jsonfile(js))
+                    os.remove(jsonfile)
                 if error == "display":
                     print(e.stderr)
                 elif error == "raise":
@@ -309,6 +544,69 @@ class Manager:
 
             return ncfile
 
+    def _run_logged(self, args, ncfile):
+        """Run args with stdout and stderr redirected to ncfile.log and ncfile.err
+
+        On failure the last 4KB of ncfile.err are attached to the raised
+        subprocess.CalledProcessError as its stderr
+        """
+        errfile = ncfile + ".err"
+        with open(ncfile + ".log", "wb") as out, open(errfile, "wb") as err:
+            try:
+                subprocess.run(args, check=True, stdout=out, stderr=err)
+            except subprocess.CalledProcessError as e:
+                err.flush()
+                with open(errfile, "rb") as f:
+                    f.seek(max(0, os.path.getsize(errfile) - 4096))
+                    e.stderr = f.read()
+                raise
+
+    def create_many(
+        self, js_list, n=0, error="raise", stdout="ignore", max_parallel=None
+    ):
+        """Run simulations for a list of inputs in parallel
+
+        Call create(js, n, error=error, stdout=stdout) for each js in js_list
+        with up to max_parallel executables running at the same time.
+        Inputs that appear more than once in js_list are simulated only once.
+        A failing simulation only cleans up its own files, the others are
+        unaffected.
+
+        Parameters:
+        js_list (list of dict): the complete input files as python
+            dictionaries. All keys must be strings such that js can be
+            converted to JSON.
+        n (integer) : (RESTART ADDON) the number of the simulation for all
+            inputs in js_list. See create
+        error (string) : see create.  With "raise" the error of the first
+            failed input in js_list is raised after all simulations finished
+        stdout (string) : see create
+        max_parallel (integer) : maximum number of simultaneous simulations.
+            If None, the number of CPUs os.cpu_count() is used
+
+        Return:
+        list of string: filenames of the entries in the order of js_list
+        """
+        if max_parallel is None:
+            max_parallel = os.cpu_count() or 1
+        hashids = []
+        unique = {}
+        for js in js_list:
+            # serialize only once, the threads reuse the bytes and hashid
+            inputbytes = _canonical_bytes(js, self.__ensure_ascii)
+            hashid = _hash_bytes(inputbytes)
+            hashids.append(hashid)
+            unique.setdefault(hashid, (js, inputbytes))
+        # the threads only wait for the executables to return
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            futures = {
+                hashid: executor.submit(
+                    self._create, js, inputbytes, hashid, n, "", error, stdout
+                )
+                for hashid, (js, inputbytes) in unique.items()
+            }
+        return [futures[hashid].result() for hashid in hashids]
+
     def recreate(self, js, n=0, name="", error="raise", stdout="ignore"):
         """Force a re-simulation:
         delete(js, n) followed by create(js, n, name, error, stdout)"""
@@ -336,7 +634,7 @@ class Manager:
         string: self.outfile( js, n) if file exists
         """
         ncfile = self.outfile(js, n)
-        exists = os.path.isfile(ncfile)
+        exists = self._isfile(ncfile)
         if not exists:
             raise ValueError("Entry does not exist")
         else:
@@ -356,10 +654,20 @@ class Manager:
         Return:
         integer: Number of simulations
         """
+        hashid = self.hashinput(js)
+        # read the registry only once
+        name = self._load_registry()[0].get(hashid, hashid)
+        return self._count(name, self._isfile)
+
+    def _count(self, name, exists):
+        """Count consecutive output files of the input with file name (without
+        .json) name
+
+        exists (callable) : exists(path) returns True if the file path exists
+        """
         number = 0
-        while self.exists(js, number):
+        while exists(self._outfile_from_name(name, number)):
             number += 1
-
         return number
 
     def exists(self, js, n=0):
@@ -375,38 +683,107 @@ class Manager:
         bool: True if output data corresponding to js exists, False else
         """
         ncfile = self.outfile(js, n)
-        return os.path.isfile(ncfile)
+        return self._isfile(ncfile)
+
+    def snapshot(self, enable=True):
+        """Answer existence queries from a single listing of directory
 
-    def files(self):
+        Take a snapshot of the file names in directory. Until the next call
+        to create (that runs a simulation), delete or delete_all or a change
+        of directory, exists, select and count use the snapshot instead of
+        asking the file system for each file, which is much faster on
+        network file systems. Files created or removed by other processes
+        in the meantime are not seen; call snapshot again to update it.
+        Note that create always checks the file system.
+
+        Parameters:
+        enable (bool) : if False, drop the snapshot
+        """
+        self._fs_cache = None
+        if enable:
+            with os.scandir(self.__directory) as it:
+                self._fs_cache = {
+                    direntry.path for direntry in it if direntry.is_file()
+                }
+
+    def _isfile(self, path):
+        """os.path.isfile(path), answered from the snapshot if there is one"""
+        if self._fs_cache is None:
+            return os.path.isfile(path)
+        return path in self._fs_cache
+
+    def files(self, include_content=False):
         """Return a list of dictionaries (sorted by id and number) with ids
             and files existing in directory
 
         The purpose here is to give the user an iterable object to search
         or tabularize the content of outputfiles
+        Entries are recognized by their file names (sha1 or registered name)
+        only, the content of the input files is not read unless
+        include_content is True.
+        See also: iter_files
+        Parameters:
+        include_content (bool) : if True, add the content of the inputfile
+            as "js" to each entry. The entries of all simulations of one input
+            share the same dictionary
         Return:
         list of dict : [ {"id": id, "n", n, "inputfile":jsonfile,
-            "outputfile" : outfile}], sorted by 'id' and 'n'
+            "outputfile" : outfile [, "js": content]}], sorted by 'id' and 'n'
         """
+        table = sorted(self.iter_files(), key=operator.itemgetter("id", "n"))
+        if include_content:
+            inputfiles = [d["inputfile"] for d in table if d["n"] == 0]
+            contents = dict(zip(inputfiles, _load_json_files(inputfiles), strict=True))
+            for d in table:
+                d["js"] = contents[d["inputfile"]]
+        return table
+
+    def iter_files(self, include_content=False):
+        """Iterate over the ids and files existing in directory
 
-        table = []
-        for filename in os.listdir(self.__directory):
-            if filename.endswith(".json") and not filename.endswith("out.json"):
-                with open(os.path.join(self.__directory, filename)) as f:
-                    # load all json files and check if they are named correctly
-                    # and have a corresponding output file
-                    js = json.load(f)
-                    number = self.count(js)  # count how many exist
-                    for n in range(0, number):
-                        ncfile = self.outfile(js, n)
-                        registry = self.get_registry()
-                        entry = {
-                            "id": registry.get(self.hashinput(js), self.hashinput(js)),
-                            "n": n,
-                            "inputfile": self.jsonfile(js),
-                            "outputfile": ncfile,
-                        }
-                        table.append(entry)
-        return sorted(table, key=operator.itemgetter("id", "n"))
+        Generate the same dictionaries as the files method one at a time and
+        in no particular order, e.g. to filter a large database without
+        holding the complete list in memory
+        Parameters:
+        include_content (bool) : see files
+        Return:
+        iterator of dict : {"id": id, "n", n, "inputfile":jsonfile,
+            "outputfile" : outfile [, "js": content]}
+        """
+        # list the directory once and answer all existence queries from it
+        with os.scandir(self.__directory) as it:
+            entries = list(it)
+        present = {direntry.path for direntry in entries if direntry.is_file()}
+        registry, names = self._load_registry()
+        for direntry in entries:
+            filename = direntry.name
+            # cheap checks first, DirEntry caches the file type
+            if (
+                not filename.endswith(".json")
+                or filename == "simplesimdb.json"
+                or not direntry.is_file()
+            ):
+                continue
+            # the file name is the id of the input: either a registered
+            # name or the sha1 of an input that has no name.  Output files
+            # are no ids, even with filetype json (the input of a name like
+            # "lay_out" also ends in "_out.json")
+            name = filename[: -len(".json")]
+            if not _is_id(name, registry, names):
+                continue
+            number = self._count(name, present.__contains__)
+            if include_content and number > 0:
+                js = _load_json(direntry.path)
+            for n in range(number):
+                entry = {
+                    "id": name,
+                    "n": n,
+                    "inputfile": direntry.path,
+                    "outputfile": self._outfile_from_name(name, n),
+                }
+                if include_content:
+                    entry["js"] = js
+                yield entry
 
     def table(self):
         """Return all exisiting (input)-data in a list of python dicts
@@ -416,19 +793,27 @@ class Manager:
         python methods.
         RESTART ADDON: the input file for a restarted simulation shows only
         once
+        See also: iter_table
 
         Return:
         list of dict : [ { ...}, {...},...] where ... represents the actual
             content of the inputfiles
         """
-        files = self.files()
-        table = []
-        for d in files:
-            with open(d["inputfile"]) as f:
-                js = json.load(f)
-                if d["n"] == 0:
-                    table.append(js)
-        return table
+        return [d["js"] for d in self.files(include_content=True) if d["n"] == 0]
+
+    def iter_table(self):
+        """Iterate over all existing (input)-data
+
+        Generate the content of the inputfiles as the table method does, but
+        one at a time and in no particular order, reading each file only when
+        it is requested, e.g.
+        (js for js in m.iter_table() if js["n"] == 128)
+        Return:
+        iterator of dict : the content of each inputfile
+        """
+        for d in self.iter_files(include_content=True):
+            if d["n"] == 0:
+                yield d["js"]
 
     def hashinput(self, js):
         """Hash the input dictionary
@@ -445,9 +830,7 @@ class Manager:
         Return:
         string: The hexadecimal sha1 hashid of the input dictionary
         """
-        inputstring = json.dumps(js, sort_keys=True, ensure_ascii=True)
-        hashed = hashlib.sha1(inputstring.encode("utf-8")).hexdigest()
-        return hashed
+        return _hash_bytes(_canonical_bytes(js, self.__ensure_ascii))
 
     def jsonfile(self, js):
         """File path to json file from the input
@@ -459,12 +842,12 @@ class Manager:
         Return:
         path: the file path of the input file
         """
-        registry = self.get_registry()
-        hashid = self.hashinput(js)
-        name = hashid
-        if hashid in registry:
-            name = registry[hashid]
-        return os.path.join(self.__directory, name + ".json")
+        return self._jsonfile(self.hashinput(js))
+
+    def _jsonfile(self, hashid):
+        """File path to json file from the hashid of the input"""
+        name = self._load_registry()[0].get(hashid, hashid)
+        return self._dir_prefix + name + ".json"
 
     def outfile(self, js, n=0):
         """File path to output file from the input
@@ -479,17 +862,35 @@ class Manager:
         Return:
         path: the file path of the output file
         """
-        hashid = self.hashinput(js)
-        sim_num = ""
-        if n > 0:
-            sim_num = hex(n)
-        registry = self.get_registry()
-        name = hashid
-        if hashid in registry:
-            name = registry[hashid]
-        if self.__filetype == "json":
-            return os.path.join(self.__directory, name + sim_num + "_out.json")
-        return os.path.join(self.__directory, name + sim_num + "." + self.__filetype)
+        return self._outfile(self.hashinput(js), n)
+
+    def _outfile(self, hashid, n=0):
+        """File path to output file from the hashid of the input"""
+        name = self._load_registry()[0].get(hashid, hashid)
+        return self._outfile_from_name(name, n)
+
+    def _outfile_from_name(self, name, n=0):
+        """File path to output file from the file name (without .json) of the
+        input"""
+        if n > 0:  # {n:#x} is hex(n)
+            return f"{self._dir_prefix}{name}{n:#x}{self._out_suffix}"
+        return f"{self._dir_prefix}{name}{self._out_suffix}"
+
+    def _is_entry_file(self, filename, registry, names):
+        """Check if filename is the name of an input or output file in the
+        database"""
+        if filename.endswith(self._out_suffix):
+            name = filename[: -len(self._out_suffix)]
+            restart = _RESTART.fullmatch(name)
+            if _is_id(name, registry, names) or (
+                restart is not None and _is_id(restart[1], registry, names)
+            ):
+                return True
+        # with filetype json the input of a name ending in "_out" ends in
+        # the output suffix, too
+        return filename.endswith(".json") and _is_id(
+            filename[: -len(".json")], registry, names
+        )
 
     def register(self, js, name):
         """Register a human readable name for the given input dictionary
@@ -504,61 +905,77 @@ class Manager:
         name (string) : A human readable name/id that is henceforth used in the
             naming of all files associated with js.
         """
-        registry = self.get_registry()
-        hashid = self.hashinput(js)
+        self._register(self.hashinput(js), name)
+
+    def _register(self, hashid, name):
+        """Register a human readable name for the hashid of an input"""
         if name == "simplesimdb":
             raise Exception(
                 "The name simplesimdb is not allowed. Choose a different name!"
             )
+        registry, names = self._load_registry()
         if hashid in registry:
             if name != registry[hashid]:
                 raise Exception(
-                    "The name '"
-                    + name
-                    + "' cannot be used! The\
- input file is already known under the name '"
-                    + registry[hashid]
-                    + "'. Use\
- delete to clear the registry."
+                    f"The name '{name}' cannot be used! The input file is already"
+                    f" known under the name '{registry[hashid]}'. Use delete to"
+                    " clear the registry."
                 )
-        else:
-            jsonfile = os.path.join(self.__directory, hashid + ".json")
-            if os.path.isfile(jsonfile):
-                raise Exception(
-                    "The name '"
-                    + name
-                    + "' cannot be used! The\
- input file is already known under the name '"
-                    + jsonfile
-                    + "'. Use\
- delete to clear the registry."
-                )
-
-            registry[hashid] = name
-        for key, value in registry.items():
-            if (value == name) and key != hashid:
-                raise Exception(
-                    "The name '"
-                    + name
-                    + "' is already in use\
- for a different simulation. Choose a different name!"
-                )
-
-        self.set_registry(registry)
+            return  # nothing to do
+        jsonfile = self._dir_prefix + hashid + ".json"
+        if os.path.isfile(jsonfile):
+            raise Exception(
+                f"The name '{name}' cannot be used! The input file is already"
+                f" known under the name '{jsonfile}'. Use delete to clear the"
+                " registry."
+            )
+        if name in names:
+            raise Exception(
+                f"The name '{name}' is already in use for a different"
+                " simulation. Choose a different name!"
+            )
+        self.set_registry({**registry, hashid: name})
 
     def get_registry(self):
         """Get a dictionary containing the mapping from sha to names
 
         Read the file "simplesimdb.json"
+        The content is cached and only read again if the file was replaced
+        (every write replaces it with a new file) or its modification time
+        or size changed.
         Return:
         dict: may be empty, contains all registered names
         """
-        registryFile = os.path.join(self.__directory, "simplesimdb.json")
-        registry = {}
-        if os.path.isfile(registryFile):
-            with open(registryFile) as f:
-                registry = json.load(f)
-        return registry
+        # callers may modify the returned dictionary
+        return dict(self._load_registry()[0])
+
+    def _load_registry(self):
+        """Return the cached registry (sha to name) and its reverse (name to
+        sha), reading "simplesimdb.json" only if it changed
+
+        The dictionaries are shared with the cache and must not be modified
+        """
+        registryFile = self._dir_prefix + "simplesimdb.json"
+        try:
+            stat = os.stat(registryFile)
+        except FileNotFoundError:
+            self._registry_cache = None
+            return {}, {}
+        key = _stat_key(stat)
+        # read the attribute once, create_many calls this from several threads
+        cache = self._registry_cache
+        if cache is None or cache[0] != key:
+            with open(registryFile, encoding="utf-8") as f:
+                cache = self._cache_registry(key, json.load(f))
+        return cache[1:]
+
+    def _cache_registry(self, key, registry):
+        """Keep and return the registry and its reverse for the file state key"""
+        registry = dict(registry)
+        reverse = {name: hashid for hashid, name in registry.items()}
+        cache = (key, registry, reverse)
+        self._registry_cache = cache
+        return cache
 
     def set_registry(self, registry):
         """Set the registry with a dictionary containing mapping from sha to names
@@ -567,11 +984,17 @@ class Manager:
         Params:
         registry (dict) : if empty, the registry is deleted
         """
-        registryFile = os.path.join(self.__directory, "simplesimdb.json")
-        with open(registryFile, "w") as f:
-            json.dump(registry, f, sort_keys=True, ensure_ascii=True, indent=4)
+        registryFile = self._dir_prefix + "simplesimdb.json"
+        self._registry_cache = None
         if not registry:
-            os.remove(registryFile)
+            with suppress(FileNotFoundError):
+                os.remove(registryFile)
+            return
+        _write_atomic(
+            registryFile, _dump_bytes(registry, self.__indent, self.__ensure_ascii)
+        )
+        stat = os.stat(registryFile)
+        self._cache_registry(_stat_key(stat), registry)
 
     def delete(self, js, n=0):
         """Delete an entry if it exists
@@ -585,32 +1008,49 @@ class Manager:
         In case n==0, both the outfile as well as the jsonfile(js) and
             any eventual registered names will be removed
         """
-        ncfile = self.outfile(js, n)
-        exists = os.path.isfile(ncfile)
-        if exists:
+        self._fs_cache = None
+        hashid = self.hashinput(js)
+        ncfile = self._outfile(hashid, n)
+        try:
             os.remove(ncfile)
-            if n == 0:
-                os.remove(self.jsonfile(js))
-                registry = self.get_registry()
-                hashid = self.hashinput(js)
-                if hashid in registry:
-                    del registry[hashid]
+        except FileNotFoundError:
+            return
+        for logfile in (ncfile + ".log", ncfile + ".err"):
+            with suppress(FileNotFoundError):
+                os.remove(logfile)
+        if n == 0:
+            os.remove(self._jsonfile(hashid))
+            registry = self.get_registry()
+            if hashid in registry:
+                del registry[hashid]
                 self.set_registry(registry)
 
     def delete_all(self):
-        """Delete all file pairs id'd by the files method
+        """Delete all input, output and log files of the database
 
-        and the directory itself (if empty)
+        as well as the registry and the directory itself (if empty).
+        Files are identified by their names only, i.e. as in the files method
+        but including inputs without output, logs of failed simulations and
+        temporary files of interrupted writes.
         ATTENTION: if you want to continue to use the object afterwards
             remember to reset the directory: m.directory = '...'
         """
-        files = self.files()
-        for entry in files:
-            if entry["n"] == 0:
-                os.remove(entry["inputfile"])
-            os.remove(entry["outputfile"])
-        registry = {}
-        self.set_registry(registry)
+        self._fs_cache = None
+        registry, names = self._load_registry()
+        with os.scandir(self.__directory) as it:
+            for direntry in it:
+                filename = direntry.name
+                if filename.endswith(".tmp"):  # <file>.<pid>.tmp
+                    filename = filename.rsplit(".", 2)[0]
+                if (
+                    filename == "simplesimdb.json"
+                    or self._is_entry_file(filename, registry, names)
+                ) or (
+                    filename.endswith((".log", ".err"))
+                    and self._is_entry_file(filename[: -len(".log")], registry, names)
+                ):
+                    os.remove(direntry.path)
+        self.set_registry({})
         with suppress(OSError):  # if the directory is non-empty, nothing happens
             os.rmdir(self.__directory)
 
@@ -1,4 +1,9 @@
+import operator
 import os.path
+import subprocess
+from pathlib import Path
+
+import pytest
 
 import simplesimdb as sim
 
@@ -27,6 +32,76 @@ def test_creation():
     assert not os.path.isdir(m.directory)
 
 
+def test_atomic_write(monkeypatch):
+    print("TEST ATOMIC WRITE")
+    m = sim.Manager(directory="atomic_test", executable="cp", filetype="json")
+    inputdata = {"Hello": "World"}
+    m.create(inputdata, name="hello")
+    # left over from interrupted writes of an input and the registry
+    stale = [
+        m.jsonfile({"Hello": "Tmp"}) + ".123.tmp",
+        os.path.join("atomic_test", "simplesimdb.json.123.tmp"),
+    ]
+    for tmpfile in stale:
+        Path(tmpfile).write_text("{")
+    assert [d["id"] for d in m.files()] == ["hello"]
+    assert m.table() == [inputdata]
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    # a failed write leaves neither a temporary nor a partial file behind
+    monkeypatch.setattr(os, "replace", fail)
+    inputdata2 = {"Hello": "World!"}
+    with pytest.raises(OSError, match="disk full"):
+        m.create(inputdata2)
+    assert not os.path.isfile(m.jsonfile(inputdata2))
+    with pytest.raises(OSError, match="disk full"):
+        m.register(inputdata2, "world")
+    monkeypatch.undo()
+    assert m.get_registry() == {m.hashinput(inputdata): "hello"}
+    assert sorted(os.listdir("atomic_test")) == sorted(
+        ["hello.json", "hello_out.json", "simplesimdb.json"]
+        + [os.path.basename(tmpfile) for tmpfile in stale]
+    )
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
+def test_indent():
+    print("TEST INDENT")
+    m = sim.Manager(directory="indent_test", executable="cp", filetype="json")
+    inputdata = {"Hello": "World"}
+    m.create(inputdata)
+    assert Path(m.jsonfile(inputdata)).read_text() == '{"Hello": "World"}'
+    m.indent = 4
+    inputdata2 = {"Hello": "World!"}
+    m.create(inputdata2, name="pretty")
+    assert Path(m.jsonfile(inputdata2)).read_text() == '{\n    "Hello": "World!"\n}'
+    assert m.table() == [inputdata, inputdata2]
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
+def test_ensure_ascii():
+    print("TEST ENSURE ASCII")
+    m = sim.Manager(directory="ascii_test", executable="cp", filetype="json")
+    m2 = sim.Manager(
+        directory="ascii_test", executable="cp", filetype="json", ensure_ascii=False
+    )
+    inputdata = {"Hello": "Wörld"}
+    # pure ASCII inputs have the same id, others do not
+    assert m.hashinput({"Hello": "World"}) == m2.hashinput({"Hello": "World"})
+    assert m.hashinput(inputdata) != m2.hashinput(inputdata)
+    m2.create(inputdata)
+    assert Path(m2.jsonfile(inputdata)).read_bytes() == '{"Hello": "Wörld"}'.encode()
+    assert m.table() == [inputdata]
+    assert not m.exists(inputdata)
+    assert m2.exists(inputdata)
+    m2.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
 def test_selection():
     print("TEST SELECTION")
     m = sim.Manager(directory="selection_test", executable="cp", filetype="json")
@@ -41,6 +116,45 @@ def test_selection():
     assert not os.path.isdir(m.directory)
 
 
+def test_create_many():
+    print("TEST CREATE MANY")
+    m = sim.Manager(directory="create_many_test", executable="cp", filetype="json")
+    inputs = [{"Hello": "World", "n": i} for i in range(5)]
+    outfiles = m.create_many([*inputs, inputs[0]], max_parallel=3)
+    assert outfiles == [m.select(inputdata) for inputdata in [*inputs, inputs[0]]]
+    assert len(m.files()) == 5
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
+def test_log_output():
+    print("TEST LOG OUTPUT")
+    m = sim.Manager(
+        directory="log_test", executable="touch", filetype="th", log_output=True
+    )
+    inputdata = {"Hello": "World"}
+    outfile = m.create(inputdata)
+    assert os.path.isfile(outfile + ".log")
+    assert os.path.isfile(outfile + ".err")
+    m.executable = "ls"  # fails because the output file does not exist
+    inputdata2 = {"Hello": "World!"}
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        m.create(inputdata2)
+    assert e.value.stderr
+    outfile2 = m.outfile(inputdata2)
+    assert not os.path.isfile(outfile2)
+    assert os.path.isfile(outfile2 + ".err")
+    # without log files stderr is only captured to be raised or displayed
+    m.log_output = False
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        m.create(inputdata2)
+    assert e.value.stderr
+    m.create(inputdata2, error="ignore")
+    assert not m.exists(inputdata2)
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
 def test_restart():
     print("TEST RESTART")
     m = sim.Manager(directory="restart_test", executable="touch", filetype="th")
@@ -59,6 +173,40 @@ def test_restart():
     assert content == [inputdata2, inputdata]
     files = m.files()
     assert len(files) == 24
+    assert [d["js"] for d in m.files(include_content=True)] == 7 * [inputdata2] + 17 * [
+        inputdata
+    ]
+    assert sorted(m.iter_files(), key=operator.itemgetter("id", "n")) == files
+    assert sorted(m.iter_table(), key=m.hashinput) == content
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
+def test_snapshot():
+    print("TEST SNAPSHOT")
+    m = sim.Manager(directory="snapshot_test", executable="touch", filetype="th")
+    inputdata = {"Hello": "World"}
+    for i in range(0, 3):
+        m.create(inputdata, i)
+    # a directory is not mistaken for an output file
+    inputdata2 = {"Hello2": "World"}
+    os.mkdir(m.outfile(inputdata2))
+    m.snapshot()
+    assert m.count(inputdata) == 3
+    assert m.exists(inputdata, 2)
+    assert not m.exists(inputdata, 3)
+    assert not m.exists(inputdata2)
+    assert m.exists(inputdata2) == os.path.isfile(m.outfile(inputdata2))
+    os.rmdir(m.outfile(inputdata2))
+    os.mkdir(m.outfile(inputdata, 3))
+    assert len(m.files()) == 3
+    os.rmdir(m.outfile(inputdata, 3))
+    m.create(inputdata, 3)  # drops the snapshot
+    assert m.count(inputdata) == 4
+    m.delete(inputdata, 3)
+    assert m.count(inputdata) == 3
+    m.snapshot(False)
+    assert m.count(inputdata) == 3
     m.delete_all()
     assert not os.path.isdir(m.directory)
 
@@ -73,9 +221,48 @@ def test_named_creation():
     m.delete(inputdata, 0)
     m.create(inputdata, 0, "hello")
     m.create(inputdata, 1, "hello")
+    with pytest.raises(Exception, match="already known under the name 'hello'"):
+        m.create(inputdata, 0, "world")
+    with pytest.raises(Exception, match="already in use"):
+        m.create({"Hello": "User"}, 0, "hello")
+    # a name ending in "out" is not mistaken for an output file
+    m.create({"Hello": "Layout"}, 0, "layout")
     content = m.table()
     print(m.files())
-    assert content == [inputdata]
+    assert content == [inputdata, {"Hello": "Layout"}]
+    # with filetype json the input of "lay_out" ends in "_out.json"
+    m.create({"Hello": "Lay out"}, 0, "lay_out")
+    assert os.path.isfile(os.path.join(m.directory, "lay_out.json"))
+    assert [d["id"] for d in m.files()] == ["hello", "hello", "lay_out", "layout"]
+    m.delete_all()
+    assert not os.path.isdir(m.directory)
+
+
+def test_shared_registry():
+    print("TEST SHARED REGISTRY")
+    m = sim.Manager(directory="registry_test", executable="touch", filetype="json")
+    m2 = sim.Manager(directory="registry_test", executable="touch", filetype="json")
+    inputdata = {"Hello": "World"}
+    assert m2.get_registry() == {}
+    m.create(inputdata, 0, "hello")
+    # m2 sees the name registered by m
+    assert m2.get_registry() == m.get_registry()
+    assert m2.outfile(inputdata) == os.path.join("registry_test", "hello_out.json")
+    with pytest.raises(Exception, match="already in use"):
+        m2.register({"Hello": "User"}, "hello")
+    m2.delete(inputdata)
+    assert m.get_registry() == {}
+    # a rewrite of the same size within one tick of the modification time
+    registryfile = os.path.join("registry_test", "simplesimdb.json")
+    hashid = m.hashinput(inputdata)
+    m.register(inputdata, "aaa")
+    assert m2.get_registry() == {hashid: "aaa"}
+    stat = os.stat(registryfile)
+    m.set_registry({hashid: "bbb"})
+    os.utime(registryfile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(registryfile).st_size == stat.st_size
+    assert m2.get_registry() == {hashid: "bbb"}
+    assert m2.outfile(inputdata) == os.path.join("registry_test", "bbb_out.json")
     m.delete_all()
     assert not os.path.isdir(m.directory)
 
@@ -92,3 +279,16 @@ def test_repeater():
     m.clean()
     assert not os.path.isfile("temp.json")
     assert not os.path.isfile("temp.nc")
+
+
+def test_large_table():
+    print("TEST LARGE TABLE")
+    m = sim.Manager(directory="large_table_test", executable="touch", filetype="th")
+    inputs = [{"Hello": "World", "n": i} for i in range(20)]
+    for inputdata in inputs:
+        m.create(inputdata)
+    content = m.table()
+    # table is ordered by id
+    assert content == sorted(inputs, key=m.hashinput)
+    m.delete_all()
+    assert not os.path.isdir(m.directory)